@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compilation of the Omori fitting kernels
+Author: Edward Xiong
+Diamond Bar High School, 11th Grade
+NHSJS Research Project: Mathematics of Earthquake Aftershocks
+
+Builds an `omori_kernels` extension module next to this script from the
+kernels in fit_kernels.py. When it is present, omori_analysis.py imports
+it instead of JIT-compiling, so repeated runs start instantly.
+Without it the analysis falls back to the cached JIT kernels.
+
+Usage: python analysis/compile_kernels.py
+"""
+
+import os
+from numba.pycc import CC
+
+from fit_kernels import log_model, log_jac, LOG_MODEL_SIGNATURE, LOG_JAC_SIGNATURE
+
+cc = CC('omori_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export('log_model', LOG_MODEL_SIGNATURE)(log_model)
+cc.export('log_jac', LOG_JAC_SIGNATURE)(log_jac)
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"Compiled omori_kernels into: {cc.output_dir}", flush=True)
@@ -0,0 +1,38 @@
+"""
+Log-space Omori fitting kernels (plain Python)
+Author: Edward Xiong
+Diamond Bar High School, 11th Grade
+NHSJS Research Project: Mathematics of Earthquake Aftershocks
+
+Un-jitted kernel bodies shared by omori_analysis.py (which JIT-compiles
+them only when no ahead-of-time build is available) and
+compile_kernels.py (which builds that ahead-of-time module).
+"""
+
+import math
+import numpy as np
+
+LOG_MODEL_SIGNATURE = 'f8[:](f8[:], f8, f8, f8)'
+LOG_JAC_SIGNATURE = 'f8[:, :](f8[:], f8, f8, f8)'
+
+
+def log_model(t, K, c, p):
+    """log10 of the modified Omori rate: log10(K) - p * log10(c + t)"""
+    out = np.empty(t.shape[0])
+    log_K = math.log10(K)
+    for i in range(t.shape[0]):
+        out[i] = log_K - p * math.log10(c + t[i])
+    return out
+
+
+def log_jac(t, K, c, p):
+    """Jacobian of log_model with respect to (K, c, p)."""
+    n = t.shape[0]
+    jac = np.empty((n, 3))
+    ln10 = math.log(10.0)
+    for i in range(n):
+        ct = c + t[i]
+        jac[i, 0] = 1.0 / (K * ln10)
+        jac[i, 1] = -p / (ct * ln10)
+        jac[i, 2] = -math.log10(ct)
+    return jac
@@ -15,18 +15,29 @@ This script fits Omori's Law to aftershock sequences and analyzes
 how parameters vary with mainshock characteristics.
 """
 
-import json
+import orjson
+import hashlib
+import pickle
 import numpy as np
 import pandas as pd
 from scipy import optimize
 from scipy import stats
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from numba import njit
 from datetime import datetime, timedelta
 import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None  # Fall back to plain NumPy for the goodness-of-fit reductions
+
 # Publication-quality figure settings
 plt.style.use('seaborn-v0_8-whitegrid')
 plt.rcParams['figure.figsize'] = (10, 6)
@@ -35,16 +46,8 @@ plt.rcParams['axes.labelsize'] = 14
 plt.rcParams['axes.titlesize'] = 16
 
 
-class NumpyEncoder(json.JSONEncoder):
-    """Custom JSON encoder for numpy types."""
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super().default(obj)
+# Bump when the fitting procedure changes so cached fits are recomputed
+FIT_CACHE_VERSION = 3
 
 
 # =============================================================================
@@ -63,8 +66,9 @@ def omori_modified(t, K, c, p):
     """
     Modified Omori-Utsu Law: n(t) = K / (c + t)^p
     The most commonly used form.
+    Evaluated as K * exp(-p * ln(c + t)), which vectorizes better than np.power.
     """
-    return K / np.power(c + t, p)
+    return K * np.exp(-p * np.log(c + t))
 
 
 def omori_exponential(t, K, tau):
@@ -75,23 +79,87 @@ def omori_exponential(t, K, tau):
     return K * np.exp(-t / tau)
 
 
+try:
+    # Ahead-of-time build from compile_kernels.py, if present, skips the JIT entirely
+    import omori_kernels
+    _log_model_kernel = omori_kernels.log_model
+    _log_jac_kernel = omori_kernels.log_jac
+except ImportError:
+    # Explicit signatures compile the kernels eagerly here (then load from cache)
+    from fit_kernels import log_model, log_jac, LOG_MODEL_SIGNATURE, LOG_JAC_SIGNATURE
+    _log_model_kernel = njit(LOG_MODEL_SIGNATURE, cache=True, fastmath=True)(log_model)
+    _log_jac_kernel = njit(LOG_JAC_SIGNATURE, cache=True, fastmath=True)(log_jac)
+
+
 # =============================================================================
 # MODEL FITTING
 # =============================================================================
 
-def prepare_data_for_fitting(aftershocks, time_unit='hours'):
+def attach_time_arrays(sequence: dict) -> dict:
+    """
+    Store aftershock hours and magnitudes as contiguous float32 arrays,
+    built once at load time from the per-event dicts of an inline JSON file.
+    """
+    aftershocks = sequence['aftershocks']
+    n = len(aftershocks)
+    sequence['hours_array'] = np.fromiter(
+        (a['hours_after_mainshock'] for a in aftershocks), dtype=np.float32, count=n)
+    sequence['magnitudes_array'] = np.fromiter(
+        (a['magnitude'] for a in aftershocks), dtype=np.float32, count=n)
+    return sequence
+
+
+def load_sequences(data_path: str) -> list:
+    """
+    Load aftershock sequences with their time arrays attached.
+    Aftershock events are read from the Parquet tables next to the JSON
+    file when present; older data files keep them inline in the JSON.
+    """
+    data_dir = os.path.dirname(data_path)
+    mainshocks_path = os.path.join(data_dir, 'mainshocks.parquet')
+    aftershocks_path = os.path.join(data_dir, 'aftershocks.parquet')
+
+    if os.path.exists(mainshocks_path) and os.path.exists(aftershocks_path):
+        mainshocks = pd.read_parquet(mainshocks_path)
+        aftershocks = pd.read_parquet(
+            aftershocks_path, columns=['mainshock_id', 'hours_after_mainshock', 'magnitude'])
+        groups = aftershocks.groupby('mainshock_id', sort=False)
+
+        sequences = []
+        for mainshock in mainshocks.to_dict(orient='records'):
+            events = groups.get_group(mainshock['id'])
+            sequences.append({
+                'mainshock': mainshock,
+                'hours_array': events['hours_after_mainshock'].to_numpy(dtype=np.float32),
+                'magnitudes_array': events['magnitude'].to_numpy(dtype=np.float32)
+            })
+        return sequences
+
+    with open(data_path, 'rb') as f:
+        data = orjson.loads(f.read())
+    sequences = data.get('sequences', [])
+
+    # Newer collections keep only per-sequence summaries in the JSON
+    if any('aftershocks' not in seq for seq in sequences):
+        raise FileNotFoundError(
+            f"Parquet tables missing: {data_path} has no inline aftershock events, "
+            f"so {mainshocks_path} and {aftershocks_path} are required")
+
+    return [attach_time_arrays(seq) for seq in sequences]
+
+
+def prepare_data_for_fitting(sequence, time_unit='hours'):
     """
     Prepare aftershock data for Omori fitting.
     Uses cumulative count method for more robust fitting.
     """
-    if not aftershocks:
+    # Magnitudes and times carry far less than float64 precision
+    times = sequence['hours_array'].astype(np.float32, copy=False)
+    if times.size == 0:
         return None, None
 
-    # Get times
-    if time_unit == 'hours':
-        times = np.array([a['hours_after_mainshock'] for a in aftershocks])
-    else:
-        times = np.array([a['days_after_mainshock'] for a in aftershocks])
+    if time_unit != 'hours':
+        times = times / 24.0
 
     times = np.sort(times)
 
@@ -99,19 +167,33 @@ def prepare_data_for_fitting(aftershocks, time_unit='hours'):
     if len(times) < 20:
         return None, None
 
-    # Use logarithmic binning for better fit at early times
-    t_min = max(0.1, times[0])  # Avoid t=0
-    t_max = times[-1]
+    bin_edges = _log_bin_edges(times[0], times[-1], len(times))
+    counts, _ = np.histogram(times, bins=bin_edges)
 
-    n_bins = min(30, len(times) // 3)
-    bin_edges = np.logspace(np.log10(t_min), np.log10(t_max), n_bins + 1)
+    return _rates_from_counts(counts, bin_edges)
 
-    counts, _ = np.histogram(times, bins=bin_edges)
+
+def _log_bin_edges(first_time, last_time, n_events):
+    """Logarithmic bin edges for a sequence (better fit at early times)."""
+    t_min = max(0.1, first_time)  # Avoid t=0
+    t_max = last_time
+
+    n_bins = min(30, n_events // 3)
+    # Geometric spacing directly from the ratio, i.e. logspace without the log10s
+    bin_edges = (t_min * (t_max / t_min) ** np.linspace(0.0, 1.0, n_bins + 1)).astype(np.float32)
+    # Pin the ends exactly so round-off can't drop the first or last event
+    bin_edges[0], bin_edges[-1] = t_min, t_max
+
+    return bin_edges
+
+
+def _rates_from_counts(counts, bin_edges):
+    """Convert binned counts to (t_data, rate_data), dropping empty bins."""
     bin_widths = np.diff(bin_edges)
     bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
 
     # Calculate rate (events per unit time)
-    rates = counts / bin_widths
+    rates = counts.astype(np.float32) / bin_widths
 
     # Filter out zero-rate bins
     mask = rates > 0
@@ -121,11 +203,82 @@ def prepare_data_for_fitting(aftershocks, time_unit='hours'):
     return t_data, rate_data
 
 
-def fit_omori_modified(t_data, rate_data):
+def prepare_all_for_fitting(sequences, time_unit='hours'):
+    """
+    Batched prepare_data_for_fitting over many sequences.
+    Bins every aftershock of every sequence with one searchsorted and one
+    bincount over the concatenated times, instead of a histogram per sequence.
+    Returns a (t_data, rate_data) pair per sequence, (None, None) if too short.
+    """
+    binned = [(None, None)] * len(sequences)
+    fit_idx = [i for i, seq in enumerate(sequences) if seq['hours_array'].size >= 20]
+    if not fit_idx:
+        return binned
+
+    sizes = np.array([sequences[i]['hours_array'].size for i in fit_idx])
+    times = np.concatenate([sequences[i]['hours_array'] for i in fit_idx]).astype(np.float32, copy=False)
+    if time_unit != 'hours':
+        times = times / 24.0
+
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    first_times = np.minimum.reduceat(times, starts)
+    last_times = np.maximum.reduceat(times, starts)
+    edges = [_log_bin_edges(t0, t1, n) for t0, t1, n in zip(first_times, last_times, sizes)]
+    n_bins = np.array([e.size - 1 for e in edges])
+
+    # Shift each sequence into its own disjoint range by a power-of-two stride;
+    # float32 times plus the stride are exact in float64, so edge ties are preserved
+    stride = 2.0 ** np.ceil(np.log2(float(last_times.max()) + 1.0))
+    seq_id = np.repeat(np.arange(len(fit_idx)), sizes)
+    flat_edges = np.concatenate([e + k * stride for k, e in enumerate(edges)])
+    edge_start = np.concatenate(([0], np.cumsum(n_bins + 1)[:-1]))
+    bin_start = np.concatenate(([0], np.cumsum(n_bins)[:-1]))
+
+    local = np.searchsorted(flat_edges, times + seq_id * stride, side='right') - 1 - edge_start[seq_id]
+    # Last bin is closed on the right, as in np.histogram
+    local = np.where(local == n_bins[seq_id], local - 1, local)
+    inside = local >= 0
+
+    counts = np.bincount(bin_start[seq_id[inside]] + local[inside], minlength=n_bins.sum())
+
+    for k, i in enumerate(fit_idx):
+        seq_counts = counts[bin_start[k]:bin_start[k] + n_bins[k]]
+        binned[i] = _rates_from_counts(seq_counts, edges[k])
+
+    return binned
+
+
+def _goodness_of_fit(t, rate_data, log_obs, K, c, p):
+    """R-squared in log space and RMSE of an Omori-Utsu fit."""
+    log_obs_mean = float(np.mean(log_obs))
+
+    if ne is not None:
+        # Fused single-pass reductions, no full-size temporaries
+        variables = {'t': t, 'rate_data': rate_data, 'log_obs': log_obs,
+                     'log_obs_mean': log_obs_mean, 'K': float(K), 'c': float(c), 'p': float(p)}
+        ss_res = float(ne.evaluate('sum((log10(K) - p * log10(c + t) - log_obs) ** 2)', local_dict=variables))
+        ss_tot = float(ne.evaluate('sum((log_obs - log_obs_mean) ** 2)', local_dict=variables))
+        sq_err = float(ne.evaluate('sum((rate_data - K * exp(-p * log(c + t))) ** 2)', local_dict=variables))
+    else:
+        log_pred = np.log10(K) - p * np.log10(c + t)
+        ss_res = np.sum((log_obs - log_pred) ** 2)
+        ss_tot = np.sum((log_obs - log_obs_mean) ** 2)
+        sq_err = np.sum((rate_data - omori_modified(t, K, c, p)) ** 2)
+
+    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+    rmse = np.sqrt(sq_err / len(t))
+
+    return r_squared, rmse
+
+
+def fit_omori_modified(t_data, rate_data, log_obs=None):
     """Fit the modified Omori-Utsu law to data."""
     if t_data is None or len(t_data) < 5:
         return None
 
+    if log_obs is None:
+        log_obs = np.log10(rate_data)
+
     # Initial guesses based on typical values
     K_init = rate_data[0] * t_data[0]  # Estimate from first point
     c_init = 0.1
@@ -133,39 +286,21 @@ def fit_omori_modified(t_data, rate_data):
 
     try:
         # Fit in log space for better numerical stability
-        def log_residuals(params):
-            K, c, p = params
-            if K <= 0 or c <= 0 or p <= 0:
-                return 1e10
-            predicted = omori_modified(t_data, K, c, p)
-            log_pred = np.log10(predicted + 1e-10)
-            log_obs = np.log10(rate_data + 1e-10)
-            return np.sum((log_pred - log_obs) ** 2)
-
-        result = optimize.minimize(
-            log_residuals,
-            x0=[K_init, c_init, p_init],
-            bounds=[(0.01, 1e6), (0.001, 10), (0.1, 3)],
-            method='L-BFGS-B'
-        )
+        t_fit = np.ascontiguousarray(t_data, dtype=np.float64)
 
-        if not result.success:
-            return None
+        popt, _ = optimize.curve_fit(
+            _log_model_kernel,
+            t_fit, log_obs,
+            p0=[K_init, c_init, p_init],
+            jac=_log_jac_kernel,
+            bounds=([0.01, 0.001, 0.1], [1e6, 10, 3]),
+            method='trf'
+        )
 
-        K, c, p = result.x
+        K, c, p = popt
 
         # Calculate goodness of fit
-        predicted = omori_modified(t_data, K, c, p)
-
-        # R-squared in log space
-        log_pred = np.log10(predicted)
-        log_obs = np.log10(rate_data)
-        ss_res = np.sum((log_obs - log_pred) ** 2)
-        ss_tot = np.sum((log_obs - np.mean(log_obs)) ** 2)
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-
-        # RMSE
-        rmse = np.sqrt(np.mean((rate_data - predicted) ** 2))
+        r_squared, rmse = _goodness_of_fit(t_fit, rate_data, log_obs, K, c, p)
 
         return {
             'K': K,
@@ -181,28 +316,25 @@ def fit_omori_modified(t_data, rate_data):
         return None
 
 
-def fit_omori_original(t_data, rate_data):
-    """Fit original Omori's Law (p=1)."""
+def fit_omori_original(t_data, rate_data, log_obs=None, p0=None):
+    """Fit original Omori's Law (p=1). `p0` optionally gives starting (K, c)."""
     if t_data is None or len(t_data) < 5:
         return None
 
+    if log_obs is None:
+        log_obs = np.log10(rate_data)
+
     try:
         popt, _ = optimize.curve_fit(
             omori_original,
             t_data, rate_data,
-            p0=[rate_data[0] * t_data[0], 0.1],
-            bounds=([0, 0.001], [1e6, 10]),
+            p0=p0 if p0 is not None else [rate_data[0] * t_data[0], 0.1],
+            bounds=([0.01, 0.001], [1e6, 10]),  # K > 0 keeps the prediction strictly positive
             maxfev=5000
         )
 
         K, c = popt
-        predicted = omori_original(t_data, K, c)
-
-        log_pred = np.log10(predicted + 1e-10)
-        log_obs = np.log10(rate_data + 1e-10)
-        ss_res = np.sum((log_obs - log_pred) ** 2)
-        ss_tot = np.sum((log_obs - np.mean(log_obs)) ** 2)
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+        r_squared, _ = _goodness_of_fit(t_data, rate_data, log_obs, K, c, 1.0)
 
         return {
             'K': K,
@@ -216,16 +348,37 @@ def fit_omori_original(t_data, rate_data):
         return None
 
 
+def fit_omori_both(t_data, rate_data):
+    """
+    Fit the modified and original Omori laws to the same data.
+    log10 of the observed rates is computed once and shared, and the p=1
+    fit is warm-started from the modified fit's (K, c).
+    Returns (modified_fit, original_fit); either may be None.
+    """
+    if t_data is None or len(t_data) < 5:
+        return None, None
+
+    log_obs = np.log10(rate_data)
+
+    modified_fit = fit_omori_modified(t_data, rate_data, log_obs)
+
+    p0 = None
+    if modified_fit:
+        # Clip into the p=1 fit's bounds; c can sit exactly on its upper bound
+        p0 = [np.clip(modified_fit['K'], 0.01, 1e6), np.clip(modified_fit['c'], 0.001, 10)]
+    original_fit = fit_omori_original(t_data, rate_data, log_obs, p0=p0)
+
+    return modified_fit, original_fit
+
+
 # =============================================================================
 # ANALYSIS
 # =============================================================================
 
-def analyze_sequence(sequence: dict) -> dict:
-    """Analyze a single aftershock sequence."""
+def mainshock_fields(sequence: dict) -> dict:
+    """Mainshock metadata carried in each result."""
     mainshock = sequence['mainshock']
-    aftershocks = sequence['aftershocks']
-
-    result = {
+    return {
         'mainshock_id': mainshock['id'],
         'mainshock_magnitude': mainshock['magnitude'],
         'mainshock_depth': mainshock['depth_km'],
@@ -233,21 +386,37 @@ def analyze_sequence(sequence: dict) -> dict:
         'mainshock_lon': mainshock['longitude'],
         'mainshock_place': mainshock['place'],
         'mainshock_time': mainshock['time'],
-        'total_aftershocks': len(aftershocks)
     }
 
+
+def analyze_sequence(sequence: dict, binned: tuple = None) -> dict:
+    """
+    Analyze a single aftershock sequence.
+    `binned` is an optional precomputed (t_data, rate_data) pair from
+    prepare_all_for_fitting.
+    """
+    result = mainshock_fields(sequence)
+    result['total_aftershocks'] = len(sequence['hours_array'])
+
     # Prepare data
-    t_data, rate_data = prepare_data_for_fitting(aftershocks, time_unit='hours')
+    if binned is None:
+        binned = prepare_data_for_fitting(sequence, time_unit='hours')
+    t_data, rate_data = binned
 
     if t_data is None:
         result['fit_success'] = False
         return result
 
-    result['t_data'] = t_data.tolist()
-    result['rate_data'] = rate_data.tolist()
+    result['t_data'] = t_data
+    result['rate_data'] = rate_data
 
-    # Fit modified Omori's Law
-    fit_result = fit_omori_modified(t_data, rate_data)
+    # Too few rate bins to constrain the fit; skip the optimizer entirely
+    if t_data.size < 5:
+        result['fit_success'] = False
+        return result
+
+    # Fit modified Omori's Law, and original Omori for comparison
+    fit_result, original_fit = fit_omori_both(t_data, rate_data)
 
     if fit_result and fit_result['success']:
         result['fit_success'] = True
@@ -259,8 +428,6 @@ def analyze_sequence(sequence: dict) -> dict:
     else:
         result['fit_success'] = False
 
-    # Also fit original Omori for comparison
-    original_fit = fit_omori_original(t_data, rate_data)
     if original_fit:
         result['original_K'] = original_fit['K']
         result['original_c'] = original_fit['c']
@@ -269,6 +436,38 @@ def analyze_sequence(sequence: dict) -> dict:
     return result
 
 
+def _warm_up_kernels():
+    """Load the compiled fitting kernels once per worker process."""
+    t = np.array([1.0, 2.0])
+    _log_model_kernel(t, 1.0, 0.1, 1.0)
+    _log_jac_kernel(t, 1.0, 0.1, 1.0)
+
+
+def fit_cache_key(sequence: dict) -> tuple:
+    """Cache key for a sequence fit: mainshock id plus a hash of its aftershock times."""
+    hours = np.ascontiguousarray(sequence['hours_array'], dtype=np.float32)
+    digest = hashlib.blake2b(hours.tobytes(), digest_size=8).hexdigest()
+    return (FIT_CACHE_VERSION, sequence['mainshock']['id'], digest)
+
+
+def load_fit_cache(cache_path: str) -> dict:
+    """Load cached per-sequence fit results, or an empty cache."""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable fit cache: {e}", flush=True)
+        return {}
+
+
+def save_fit_cache(cache: dict, cache_path: str):
+    """Save per-sequence fit results for later runs."""
+    with open(cache_path, 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def create_visualizations(results: list, output_dir: str):
     """Create publication-quality figures."""
     os.makedirs(output_dir, exist_ok=True)
@@ -279,11 +478,19 @@ def create_visualizations(results: list, output_dir: str):
         print("Not enough good fits for visualization", flush=True)
         return
 
+    # One figure on the Agg canvas is reused for every plot (no pyplot state)
+    fig = Figure(figsize=(10, 7))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    def save(filename):
+        fig.tight_layout()
+        fig.savefig(os.path.join(output_dir, filename), dpi=300, bbox_inches='tight')
+        ax.clear()
+
     # 1. Example Omori fit plot
     best_result = max(good_results, key=lambda x: x.get('r_squared', 0))
 
-    fig, ax = plt.subplots(figsize=(10, 7))
-
     t_data = np.array(best_result['t_data'])
     rate_data = np.array(best_result['rate_data'])
 
@@ -305,14 +512,12 @@ def create_visualizations(results: list, output_dir: str):
     ax.legend(loc='upper right', fontsize=11)
     ax.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'example_omori_fit.png'), dpi=300, bbox_inches='tight')
-    plt.close()
+    save('example_omori_fit.png')
 
     # 2. Distribution of p values
     p_values = [r['p'] for r in good_results if 'p' in r]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.set_size_inches(10, 6)
     ax.hist(p_values, bins=15, color='steelblue', edgecolor='black', alpha=0.8)
     ax.axvline(x=np.mean(p_values), color='red', linestyle='--', linewidth=2,
                label=f'Mean p = {np.mean(p_values):.2f}')
@@ -323,15 +528,13 @@ def create_visualizations(results: list, output_dir: str):
     ax.set_title("Distribution of Omori's Law Decay Exponent (p)")
     ax.legend()
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'p_value_distribution.png'), dpi=300, bbox_inches='tight')
-    plt.close()
+    save('p_value_distribution.png')
 
     # 3. p vs mainshock magnitude
     mags = [r['mainshock_magnitude'] for r in good_results]
     p_vals = [r['p'] for r in good_results]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.set_size_inches(10, 6)
     ax.scatter(mags, p_vals, s=100, c='coral', edgecolors='black', alpha=0.8)
 
     # Linear fit
@@ -347,14 +550,12 @@ def create_visualizations(results: list, output_dir: str):
     ax.legend()
     ax.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'p_vs_magnitude.png'), dpi=300, bbox_inches='tight')
-    plt.close()
+    save('p_vs_magnitude.png')
 
     # 4. R² distribution
     r2_values = [r['r_squared'] for r in good_results]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.set_size_inches(10, 6)
     ax.hist(r2_values, bins=15, color='forestgreen', edgecolor='black', alpha=0.8)
     ax.axvline(x=np.mean(r2_values), color='red', linestyle='--', linewidth=2,
                label=f'Mean R² = {np.mean(r2_values):.3f}')
@@ -363,16 +564,14 @@ def create_visualizations(results: list, output_dir: str):
     ax.set_title("Distribution of Omori's Law Fit Quality")
     ax.legend()
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'r_squared_distribution.png'), dpi=300, bbox_inches='tight')
-    plt.close()
+    save('r_squared_distribution.png')
 
     # 5. Comparison: Original vs Modified Omori
     original_r2 = [r.get('original_r_squared', 0) for r in good_results if 'original_r_squared' in r]
     modified_r2 = [r['r_squared'] for r in good_results if 'original_r_squared' in r]
 
     if original_r2 and modified_r2:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig.set_size_inches(10, 6)
 
         x = np.arange(2)
         means = [np.mean(original_r2), np.mean(modified_r2)]
@@ -389,9 +588,7 @@ def create_visualizations(results: list, output_dir: str):
             ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.02,
                     f'{val:.3f}', ha='center', va='bottom', fontsize=12)
 
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'original_vs_modified.png'), dpi=300, bbox_inches='tight')
-        plt.close()
+        save('original_vs_modified.png')
 
     print(f"Visualizations saved to: {output_dir}", flush=True)
 
@@ -411,20 +608,32 @@ def main():
         print("Please run collect_earthquake_data.py first.", flush=True)
         return
 
-    with open(data_path) as f:
-        data = json.load(f)
-
-    sequences = data.get('sequences', [])
+    sequences = load_sequences(data_path)
     print(f"Loaded {len(sequences)} aftershock sequences", flush=True)
 
-    # Analyze each sequence
-    results = []
-    for i, seq in enumerate(sequences):
+    # Reuse fits of sequences whose aftershock data hasn't changed since the last run
+    cache_path = os.path.join(os.path.dirname(__file__), 'fit_cache.pkl')
+    cache = load_fit_cache(cache_path)
+    keys = [fit_cache_key(seq) for seq in sequences]
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    print(f"Reusing {len(sequences) - len(missing)} cached fits, fitting {len(missing)}", flush=True)
+
+    if missing:
+        # Bin all new sequences in one batch, then fit them in parallel (they are independent)
+        to_fit = [sequences[i] for i in missing]
+        binned = prepare_all_for_fitting(to_fit, time_unit='hours')
+        with ProcessPoolExecutor(initializer=_warm_up_kernels) as executor:
+            for i, result in zip(missing, executor.map(analyze_sequence, to_fit, binned, chunksize=2)):
+                cache[keys[i]] = result
+        save_fit_cache(cache, cache_path)
+
+    # The key only covers the aftershock times, so take mainshock metadata
+    # (which USGS may revise) from the current data rather than the cache
+    results = [{**cache[key], **mainshock_fields(seq)} for seq, key in zip(sequences, keys)]
+
+    for i, (seq, result) in enumerate(zip(sequences, results)):
         ms = seq['mainshock']
-        print(f"\n[{i+1}/{len(sequences)}] Analyzing M{ms['magnitude']:.1f} - {ms['place'][:30]}...", flush=True)
-
-        result = analyze_sequence(seq)
-        results.append(result)
+        print(f"\n[{i+1}/{len(sequences)}] Analyzed M{ms['magnitude']:.1f} - {ms['place'][:30]}...", flush=True)
 
         if result.get('fit_success'):
             print(f"    K={result['K']:.2f}, c={result['c']:.3f}, p={result['p']:.2f}, R²={result['r_squared']:.3f}", flush=True)
@@ -433,8 +642,8 @@ def main():
 
     # Save results
     output_path = os.path.join(os.path.dirname(__file__), 'analysis_results.json')
-    with open(output_path, 'w') as f:
-        json.dump(results, f, indent=2, cls=NumpyEncoder)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     print(f"\nResults saved to: {output_path}", flush=True)
 
     # Create visualizations
@@ -10,16 +10,32 @@ and test Omori's Law: n(t) = K / (c + t)^p
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
+import numpy as np
+import pandas as pd
 import time
 import os
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Dict, List, Optional
 import csv
+import importlib.util
 
 # USGS API Configuration
 BASE_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-RATE_LIMIT_DELAY = 0.5  # Be nice to the API
+RATE_LIMIT_DELAY = 0.5  # Be nice to the API: sustained rate of one request start per delay
+MAX_WORKERS = 4  # Concurrent requests in flight
+
+# Keep-alive session shared by all requests (reuses TCP/TLS connections)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
+_request_slots = threading.Semaphore(MAX_WORKERS)
+_rate_lock = threading.Lock()
+_rate_tokens = float(MAX_WORKERS)
+_rate_last_refill = time.monotonic()
 
 # Parameters for mainshock selection
 MIN_MAINSHOCK_MAGNITUDE = 6.0  # Focus on significant earthquakes
@@ -27,6 +43,24 @@ AFTERSHOCK_RADIUS_KM = 100  # Search radius for aftershocks
 AFTERSHOCK_DAYS = 30  # Days to track aftershocks
 
 
+def _wait_for_rate_limit():
+    """
+    Token bucket shared by all threads: up to MAX_WORKERS requests may start
+    together, and tokens refill at one per RATE_LIMIT_DELAY.
+    """
+    global _rate_tokens, _rate_last_refill
+    while True:
+        with _rate_lock:
+            now = time.monotonic()
+            _rate_tokens = min(MAX_WORKERS, _rate_tokens + (now - _rate_last_refill) / RATE_LIMIT_DELAY)
+            _rate_last_refill = now
+            if _rate_tokens >= 1:
+                _rate_tokens -= 1
+                return
+            wait = (1 - _rate_tokens) * RATE_LIMIT_DELAY
+        time.sleep(wait)
+
+
 def fetch_earthquakes(
     starttime: str,
     endtime: str,
@@ -55,11 +89,11 @@ def fetch_earthquakes(
         params["longitude"] = longitude
         params["maxradiuskm"] = maxradiuskm
 
-    time.sleep(RATE_LIMIT_DELAY)
-
     try:
-        print(f"  Fetching: {starttime} to {endtime}...", flush=True)
-        response = requests.get(BASE_URL, params=params, timeout=60)
+        with _request_slots:
+            _wait_for_rate_limit()
+            print(f"  Fetching: {starttime} to {endtime}...", flush=True)
+            response = SESSION.get(BASE_URL, params=params, timeout=60)
         response.raise_for_status()
         data = response.json()
         features = data.get("features", [])
@@ -70,49 +104,64 @@ def fetch_earthquakes(
         return []
 
 
-def parse_earthquake(feature: Dict) -> Dict:
-    """Parse earthquake feature into clean dictionary."""
-    props = feature.get("properties", {})
-    coords = feature.get("geometry", {}).get("coordinates", [0, 0, 0])
-
-    # Convert millisecond timestamp to datetime
-    time_ms = props.get("time", 0)
-    eq_time = datetime.utcfromtimestamp(time_ms / 1000)
-
-    return {
-        "id": feature.get("id", ""),
-        "time": eq_time.isoformat(),
-        "timestamp": time_ms,
-        "magnitude": props.get("mag"),
-        "mag_type": props.get("magType", ""),
-        "longitude": coords[0],
-        "latitude": coords[1],
-        "depth_km": coords[2],
-        "place": props.get("place", ""),
-        "type": props.get("type", "earthquake")
-    }
+def _iso_times(time_ms: List[int]) -> List[str]:
+    """
+    ISO 8601 UTC strings for millisecond timestamps, converted in one NumPy call.
+    Matches datetime.isoformat(): the fraction is omitted when it is zero.
+    """
+    times = np.datetime_as_string(np.array(time_ms, dtype="datetime64[ms]"), unit="us")
+    return [t[:-7] if t.endswith(".000000") else t for t in times.tolist()]
 
 
-def get_major_earthquakes(start_year: int, end_year: int, min_mag: float = 6.0) -> List[Dict]:
-    """Get all major earthquakes in a date range."""
-    all_quakes = []
+def parse_earthquakes(features: List[Dict]) -> List[Dict]:
+    """Parse earthquake features into clean dictionaries."""
+    quakes = []
+    time_ms = []
+
+    for feature in features:
+        props = feature.get("properties", {})
+        coords = feature.get("geometry", {}).get("coordinates", [0, 0, 0])
+        ms = props.get("time", 0)
+        time_ms.append(ms)
+
+        quakes.append({
+            "id": feature.get("id", ""),
+            "time": None,  # Filled in below for all events at once
+            "timestamp": ms,
+            "magnitude": props.get("mag"),
+            "mag_type": props.get("magType", ""),
+            "longitude": coords[0],
+            "latitude": coords[1],
+            "depth_km": coords[2],
+            "place": props.get("place", ""),
+            "type": props.get("type", "earthquake")
+        })
+
+    for eq, eq_time in zip(quakes, _iso_times(time_ms)):
+        eq["time"] = eq_time
+
+    return quakes
 
-    for year in range(start_year, end_year + 1):
-        starttime = f"{year}-01-01"
-        endtime = f"{year}-12-31"
 
-        features = fetch_earthquakes(
-            starttime=starttime,
-            endtime=endtime,
-            minmagnitude=min_mag
+def get_major_earthquakes(start_year: int, end_year: int, min_mag: float = 6.0) -> List[Dict]:
+    """Get all major earthquakes in a date range."""
+    # One query per year: M6+ is ~150 events a year, far below the 20000 limit
+    windows = [(f"{year}-01-01", f"{year + 1}-01-01") for year in range(start_year, end_year + 1)]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(
+            lambda window: fetch_earthquakes(
+                starttime=window[0],
+                endtime=window[1],
+                minmagnitude=min_mag
+            ),
+            windows
         )
 
-        for feature in features:
-            eq = parse_earthquake(feature)
-            if eq["magnitude"] and eq["magnitude"] >= min_mag:
-                all_quakes.append(eq)
+        # map() yields in window order, so quakes stay sorted by time
+        features = [feature for batch in results for feature in batch]
 
-    return all_quakes
+    return [eq for eq in parse_earthquakes(features) if eq["magnitude"] and eq["magnitude"] >= min_mag]
 
 
 def get_aftershock_sequence(
@@ -122,9 +171,10 @@ def get_aftershock_sequence(
     min_aftershock_mag: float = 2.0
 ) -> List[Dict]:
     """Get aftershocks following a mainshock."""
-    main_time = datetime.fromisoformat(mainshock["time"])
-    starttime = (main_time + timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
-    endtime = (main_time + timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S")
+    main_ts = mainshock["timestamp"]  # ms since epoch
+    main_time = pd.Timestamp(main_ts, unit="ms")
+    starttime = (main_time + pd.Timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+    endtime = (main_time + pd.Timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S")
 
     features = fetch_earthquakes(
         starttime=starttime,
@@ -136,14 +186,12 @@ def get_aftershock_sequence(
     )
 
     aftershocks = []
-    for feature in features:
-        eq = parse_earthquake(feature)
+    for eq in parse_earthquakes(features):
         if eq["magnitude"] and eq["magnitude"] < mainshock["magnitude"]:
-            # Calculate time since mainshock (in days)
-            eq_time = datetime.fromisoformat(eq["time"])
-            delta = eq_time - main_time
-            eq["days_after_mainshock"] = delta.total_seconds() / 86400
-            eq["hours_after_mainshock"] = delta.total_seconds() / 3600
+            # Time since mainshock straight from the millisecond timestamps
+            delta_ms = eq["timestamp"] - main_ts
+            eq["days_after_mainshock"] = delta_ms / 86_400_000.0
+            eq["hours_after_mainshock"] = delta_ms / 3_600_000.0
             aftershocks.append(eq)
 
     return aftershocks
@@ -154,27 +202,26 @@ def bin_aftershocks_by_time(aftershocks: List[Dict], bin_hours: float = 1.0) ->
     if not aftershocks:
         return []
 
-    max_hours = max(a["hours_after_mainshock"] for a in aftershocks)
-    bins = []
+    hours = np.fromiter(
+        (a["hours_after_mainshock"] for a in aftershocks),
+        dtype=np.float64, count=len(aftershocks)
+    )
 
-    t = 0
-    while t < max_hours:
-        count = sum(
-            1 for a in aftershocks
-            if t <= a["hours_after_mainshock"] < t + bin_hours
-        )
-        rate = count / bin_hours  # Aftershocks per hour
+    # Fixed-width bins from t=0 up to the last aftershock
+    n_bins = int(np.ceil(hours.max() / bin_hours))
+    edges = np.arange(n_bins + 1) * bin_hours
+    counts, _ = np.histogram(hours, bins=edges)
 
-        bins.append({
-            "time_start_hours": t,
-            "time_end_hours": t + bin_hours,
-            "time_midpoint_hours": t + bin_hours / 2,
+    return [
+        {
+            "time_start_hours": start,
+            "time_end_hours": end,
+            "time_midpoint_hours": start + bin_hours / 2,
             "count": count,
-            "rate_per_hour": rate
-        })
-        t += bin_hours
-
-    return bins
+            "rate_per_hour": count / bin_hours  # Aftershocks per hour
+        }
+        for count, start, end in zip(counts.tolist(), edges[:-1].tolist(), edges[1:].tolist())
+    ]
 
 
 def collect_aftershock_sequences(
@@ -218,11 +265,53 @@ def collect_aftershock_sequences(
 def save_data(data: Dict, filename: str):
     """Save data to JSON file."""
     filepath = os.path.join(os.path.dirname(__file__), filename)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     print(f"\nData saved to: {filepath}", flush=True)
 
 
+def parquet_engine_available() -> bool:
+    """Whether pandas has an engine for writing Parquet files."""
+    return any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet"))
+
+
+def save_sequences_parquet(sequences: List[Dict], mainshocks_file: str, aftershocks_file: str) -> bool:
+    """
+    Save mainshocks and their aftershock events as columnar Parquet tables.
+    Returns True once both tables are on disk. On failure (or with nothing
+    to save) any existing tables are removed so they cannot be mistaken for
+    this run's data, and False is returned.
+    """
+    data_dir = os.path.dirname(__file__)
+    paths = [os.path.join(data_dir, mainshocks_file), os.path.join(data_dir, aftershocks_file)]
+
+    try:
+        if not sequences:
+            raise ValueError("no sequences to save")
+
+        mainshocks = pd.DataFrame([seq["mainshock"] for seq in sequences])
+        aftershocks = pd.concat(
+            [pd.DataFrame(seq["aftershocks"]).assign(mainshock_id=seq["mainshock"]["id"]) for seq in sequences],
+            ignore_index=True
+        )
+
+        # Relative times need no more than float32 precision (~0.1 s over 30 days)
+        aftershocks["hours_after_mainshock"] = aftershocks["hours_after_mainshock"].astype(np.float32)
+        aftershocks["days_after_mainshock"] = aftershocks["days_after_mainshock"].astype(np.float32)
+
+        mainshocks.to_parquet(paths[0], index=False)
+        aftershocks.to_parquet(paths[1], index=False)
+    except Exception as e:
+        print(f"Parquet tables not saved ({e})", flush=True)
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return False
+
+    print(f"Parquet tables saved to: {data_dir}", flush=True)
+    return True
+
+
 def save_summary_csv(sequences: List[Dict], filename: str):
     """Save summary data to CSV."""
     filepath = os.path.join(os.path.dirname(__file__), filename)
@@ -254,6 +343,10 @@ def main():
     print("Testing Omori's Law on Aftershock Sequences", flush=True)
     print("=" * 60, flush=True)
 
+    # Check up front rather than after the whole collection run
+    if not parquet_engine_available():
+        raise ImportError("Saving the aftershock tables needs a Parquet engine: pip install pyarrow")
+
     # Collect major earthquakes from recent years
     print("\n--- Fetching Major Earthquakes (M6.0+) ---", flush=True)
     mainshocks = get_major_earthquakes(
@@ -267,7 +360,10 @@ def main():
     print("\n--- Collecting Aftershock Sequences ---", flush=True)
     sequences = collect_aftershock_sequences(mainshocks, max_sequences=40)
 
-    # Save data
+    # Save data. Aftershock events go to Parquet and the JSON keeps
+    # per-sequence summaries, but the events are only dropped from the JSON
+    # once the tables are safely on disk; otherwise they stay inline.
+    events_in_parquet = save_sequences_parquet(sequences, "mainshocks.parquet", "aftershocks.parquet")
     output_data = {
         "collection_date": datetime.now().isoformat(),
         "parameters": {
@@ -275,7 +371,10 @@ def main():
             "aftershock_radius_km": AFTERSHOCK_RADIUS_KM,
             "aftershock_days": AFTERSHOCK_DAYS
         },
-        "sequences": sequences
+        "sequences": [
+            {k: v for k, v in seq.items() if not (events_in_parquet and k == "aftershocks")}
+            for seq in sequences
+        ]
     }
 
     save_data(output_data, "earthquake_data.json")
@@ -9,33 +9,139 @@ Interactive visualization of earthquake aftershock sequences
 and Omori's Law fits.
 """
 
-from flask import Flask, render_template, jsonify
-import json
+from flask import Flask, Response, render_template, request
+import functools
+import gzip
+import hashlib
+import html
+import mmap
+import orjson
 import os
+import tempfile
 import numpy as np
+from numba import njit
 
 app = Flask(__name__)
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 ANALYSIS_DIR = os.path.join(os.path.dirname(__file__), '..', 'analysis')
+ANALYSIS_PATH = os.path.join(ANALYSIS_DIR, 'analysis_results.json')
+
+
+def _mtime_key():
+    """Modification time of the results file; a change invalidates the cache."""
+    return os.path.getmtime(ANALYSIS_PATH) if os.path.exists(ANALYSIS_PATH) else None
+
+
+def _parse_mapped(path):
+    """Parse a JSON file straight from a memory map, without reading it into a bytes copy."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return orjson.loads(b'')  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_data_cached(mtime_key):
+    """Parse the analysis results once per version of the file on disk."""
+    if os.path.exists(ANALYSIS_PATH):
+        return _parse_mapped(ANALYSIS_PATH)
+    return []
 
 
 def load_data():
-    """Load earthquake data and analysis results."""
-    eq_data = None
-    analysis_results = []
+    """Load analysis results (cached until the file changes).
+
+    Every page and endpoint is built from the fitted results alone, so the
+    raw earthquake catalog in data/ is not loaded here.
+    """
+    return _load_data_cached(_mtime_key())
+
+
+@njit('f8[:](f8[:], f8, f8, f8)', cache=True, fastmath=True)
+def _omori_rate(t, K, c, p):
+    """Modified Omori rate K / (c + t)^p"""
+    out = np.empty(t.shape[0])
+    for i in range(t.shape[0]):
+        out[i] = K / (c + t[i]) ** p
+    return out
+
+
+def _decay_curve(result, n_points=101):
+    """Sample the fitted Omori curve over the observed time range (log-spaced)."""
+    t_data = np.asarray(result['t_data'], dtype=np.float64)
+    t_smooth = np.geomspace(t_data.min(), t_data.max(), n_points)
+    rate_fit = _omori_rate(t_smooth, float(result['K']), float(result['c']), float(result['p']))
+    return t_smooth, rate_fit
+
+
+@functools.lru_cache(maxsize=1)
+def _analysis_by_id(mtime_key):
+    """Analysis results indexed by mainshock id, with fitted curves pre-sampled."""
+    analysis_results = _load_data_cached(mtime_key)
+
+    by_id = {}
+    for r in analysis_results:
+        if r.get('t_data') and r.get('K') and r.get('c') and r.get('p'):
+            t_smooth, rate_fit = _decay_curve(r)
+            r = {**r, 't_smooth': t_smooth, 'rate_fit': rate_fit}
+        by_id[r['mainshock_id']] = r
+    return by_id
+
+
+@functools.lru_cache(maxsize=1)
+def _result_arrays(mtime_key):
+    """Numeric fields of the analysis results as one NumPy array per field.
+
+    Filtering and statistics run on these; the result dicts are only
+    consulted for the text fields.
+    """
+    analysis_results = _load_data_cached(mtime_key)
+    n = len(analysis_results)
+
+    def column(key, default, dtype=np.float64):
+        return np.fromiter((r.get(key, default) for r in analysis_results), dtype=dtype, count=n)
+
+    return {
+        'fit_success': column('fit_success', False, dtype=bool),
+        'r_squared': column('r_squared', 0.0),
+        'p': column('p', np.nan),
+        'magnitude': column('mainshock_magnitude', np.nan),
+    }
+
+
+def _json_response(payload, status=200):
+    """Serialize a payload with orjson (NumPy scalars and arrays included)."""
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(body, status=status, mimetype='application/json')
+
+
+@functools.lru_cache(maxsize=8)
+def _etag(body):
+    """Content hash of a pre-encoded payload."""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+@functools.lru_cache(maxsize=8)
+def _gzipped(body):
+    """Gzip a pre-encoded payload once rather than on every request."""
+    return gzip.compress(body, compresslevel=6)
 
-    eq_path = os.path.join(DATA_DIR, 'earthquake_data.json')
-    if os.path.exists(eq_path):
-        with open(eq_path) as f:
-            eq_data = json.load(f)
 
-    analysis_path = os.path.join(ANALYSIS_DIR, 'analysis_results.json')
-    if os.path.exists(analysis_path):
-        with open(analysis_path) as f:
-            analysis_results = json.load(f)
+def _cached_json_response(body):
+    """Serve pre-encoded JSON that only changes with the data files.
 
-    return eq_data, analysis_results
+    Sent gzip-compressed when the client accepts it, and answered with
+    304 Not Modified when the client already holds this version.
+    """
+    headers = {'Cache-Control': 'public, max-age=300', 'Vary': 'Accept-Encoding'}
+    if request.accept_encodings['gzip']:
+        body = _gzipped(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    response = Response(body, mimetype='application/json', headers=headers)
+    response.set_etag(_etag(body))
+    return response.make_conditional(request)
 
 
 @app.route('/')
@@ -43,68 +149,102 @@ def index():
     return render_template('index.html')
 
 
+@functools.lru_cache(maxsize=1)
+def _sequences_json(mtime_key):
+    """Encoded /api/sequences payload, built once per data version."""
+    analysis_results = _load_data_cached(mtime_key)
+    columns = _result_arrays(mtime_key)
+
+    sequences = []
+    for i in np.flatnonzero(columns['fit_success']):
+        r = analysis_results[i]
+        sequences.append({
+            'id': r['mainshock_id'],
+            'magnitude': columns['magnitude'][i],
+            'place': r['mainshock_place'],
+            'time': r['mainshock_time'],
+            'aftershocks': r['total_aftershocks'],
+            'p': columns['p'][i],
+            'r_squared': columns['r_squared'][i]
+        })
+
+    return orjson.dumps(sequences, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+@functools.lru_cache(maxsize=1)
+def _sequence_options_json(mtime_key):
+    """Encoded /api/sequences_options payload: the sequence <option> list as HTML."""
+    analysis_results = _load_data_cached(mtime_key)
+    columns = _result_arrays(mtime_key)
+
+    options = ['<option value="">Select an earthquake...</option>']
+    for i in np.flatnonzero(columns['fit_success']):
+        r = analysis_results[i]
+        label = f"M{columns['magnitude'][i]:.1f} - {r['mainshock_place'][:40]}"
+        options.append(f'<option value="{html.escape(r["mainshock_id"])}">{html.escape(label)}</option>')
+
+    return orjson.dumps({'html': ''.join(options)})
+
+
+@functools.lru_cache(maxsize=1)
+def _summary_json(mtime_key):
+    """Encoded /api/summary payload, or None when there are no good fits."""
+    analysis_results = _load_data_cached(mtime_key)
+
+    columns = _result_arrays(mtime_key)
+    good_fits = np.flatnonzero(columns['fit_success'] & (columns['r_squared'] > 0.5))
+
+    if good_fits.size == 0:
+        return None
+
+    p_values = columns['p'][good_fits]
+    r2_values = columns['r_squared'][good_fits]
+    p_counts, p_edges = np.histogram(p_values, bins=15)
+
+    return orjson.dumps({
+        'total_sequences': len(analysis_results),
+        'good_fits': int(good_fits.size),
+        'mean_p': p_values.mean(),
+        'std_p': p_values.std(),
+        'min_p': p_values.min(),
+        'max_p': p_values.max(),
+        'mean_r_squared': r2_values.mean(),
+        'p_histogram': {'counts': p_counts, 'edges': p_edges}
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
 @app.route('/api/sequences')
 def get_sequences():
     """Get list of analyzed earthquake sequences."""
-    _, analysis_results = load_data()
+    return _cached_json_response(_sequences_json(_mtime_key()))
 
-    sequences = []
-    for r in analysis_results:
-        if r.get('fit_success'):
-            sequences.append({
-                'id': r['mainshock_id'],
-                'magnitude': r['mainshock_magnitude'],
-                'place': r['mainshock_place'],
-                'time': r['mainshock_time'],
-                'aftershocks': r['total_aftershocks'],
-                'p': r.get('p'),
-                'r_squared': r.get('r_squared')
-            })
 
-    return jsonify(sequences)
+@app.route('/api/sequences_options')
+def get_sequences_options():
+    """Get the sequence selector options as prebuilt HTML."""
+    return _cached_json_response(_sequence_options_json(_mtime_key()))
 
 
 @app.route('/api/sequence/<seq_id>')
 def get_sequence(seq_id):
     """Get detailed data for a specific sequence."""
-    eq_data, analysis_results = load_data()
-
-    # Find in analysis results
-    analysis = None
-    for r in analysis_results:
-        if r['mainshock_id'] == seq_id:
-            analysis = r
-            break
+    analysis = _analysis_by_id(_mtime_key()).get(seq_id)
 
     if not analysis:
-        return jsonify({'error': 'Sequence not found'}), 404
+        return _json_response({'error': 'Sequence not found'}, status=404)
 
-    return jsonify(analysis)
+    return _json_response(analysis)
 
 
 @app.route('/api/summary')
 def get_summary():
     """Get summary statistics."""
-    _, analysis_results = load_data()
-
-    good_fits = [r for r in analysis_results if r.get('fit_success') and r.get('r_squared', 0) > 0.5]
+    body = _summary_json(_mtime_key())
 
-    if not good_fits:
-        return jsonify({'error': 'No analysis results available'}), 404
+    if body is None:
+        return _json_response({'error': 'No analysis results available'}, status=404)
 
-    p_values = [r['p'] for r in good_fits]
-    r2_values = [r['r_squared'] for r in good_fits]
-
-    return jsonify({
-        'total_sequences': len(analysis_results),
-        'good_fits': len(good_fits),
-        'mean_p': np.mean(p_values),
-        'std_p': np.std(p_values),
-        'min_p': min(p_values),
-        'max_p': max(p_values),
-        'mean_r_squared': np.mean(r2_values),
-        'results': analysis_results
-    })
+    return _cached_json_response(body)
 
 
 INDEX_HTML = '''
@@ -253,21 +393,12 @@ INDEX_HTML = '''
     </div>
 
     <script>
-        let sequencesData = [];
         let summaryData = null;
 
         async function init() {
-            const seqResponse = await fetch('/api/sequences');
-            sequencesData = await seqResponse.json();
-
-            const seqSelect = document.getElementById('seqSelect');
-            seqSelect.innerHTML = '<option value="">Select an earthquake...</option>';
-            sequencesData.forEach(seq => {
-                const option = document.createElement('option');
-                option.value = seq.id;
-                option.textContent = `M${seq.magnitude.toFixed(1)} - ${seq.place.substring(0, 40)}`;
-                seqSelect.appendChild(option);
-            });
+            const optionsResponse = await fetch('/api/sequences_options');
+            const options = await optionsResponse.json();
+            document.getElementById('seqSelect').innerHTML = options.html;
 
             const summaryResponse = await fetch('/api/summary');
             summaryData = await summaryResponse.json();
@@ -324,19 +455,10 @@ INDEX_HTML = '''
                 marker: { size: 10, color: '#ff6b6b' }
             }];
 
-            if (data.K && data.c && data.p) {
-                const t_smooth = [];
-                const rate_fit = [];
-                const tMin = Math.min(...t_data);
-                const tMax = Math.max(...t_data);
-                for (let i = 0; i <= 100; i++) {
-                    const t = tMin * Math.pow(tMax/tMin, i/100);
-                    t_smooth.push(t);
-                    rate_fit.push(data.K / Math.pow(data.c + t, data.p));
-                }
+            if (data.t_smooth && data.rate_fit) {
                 traces.push({
-                    x: t_smooth,
-                    y: rate_fit,
+                    x: data.t_smooth,
+                    y: data.rate_fit,
                     mode: 'lines',
                     name: `Omori fit (p=${data.p.toFixed(2)})`,
                     line: { width: 3, color: '#ffd93d' }
@@ -380,17 +502,15 @@ INDEX_HTML = '''
         }
 
         function drawPDistribution() {
-            if (!summaryData || !summaryData.results) return;
-
-            const p_values = summaryData.results
-                .filter(r => r.fit_success && r.r_squared > 0.5)
-                .map(r => r.p);
+            if (!summaryData || !summaryData.p_histogram) return;
 
+            const { counts, edges } = summaryData.p_histogram;
             const trace = {
-                x: p_values,
-                type: 'histogram',
-                marker: { color: '#ff6b6b' },
-                nbinsx: 15
+                x: counts.map((_, i) => (edges[i] + edges[i + 1]) / 2),
+                y: counts,
+                width: counts.map((_, i) => edges[i + 1] - edges[i]),
+                type: 'bar',
+                marker: { color: '#ff6b6b' }
             };
 
             const layout = {
@@ -417,9 +537,50 @@ INDEX_HTML = '''
 '''
 
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
-os.makedirs(TEMPLATE_DIR, exist_ok=True)
-with open(os.path.join(TEMPLATE_DIR, 'index.html'), 'w') as f:
-    f.write(INDEX_HTML)
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, 'index.html')
+
+
+def write_template():
+    """Write index.html, skipping the write when it is already up to date.
+
+    The new file is written alongside and swapped in with os.replace, so a
+    concurrent reader sees either the old template or the new one, never a
+    truncated file.
+    """
+    if os.path.exists(TEMPLATE_PATH):
+        with open(TEMPLATE_PATH) as f:
+            if f.read() == INDEX_HTML:
+                return
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=TEMPLATE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(INDEX_HTML)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, TEMPLATE_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def warm_caches():
+    """Write the page template, load the data and build the API payloads up front.
+
+    Run at import so that under gunicorn's preload_app the master does this
+    once, before any worker forks or serves a request, and the workers share
+    the result instead of each loading it.
+    """
+    write_template()
+    mtime_key = _mtime_key()
+    _analysis_by_id(mtime_key)
+    for body in (_sequences_json(mtime_key), _sequence_options_json(mtime_key),
+                 _summary_json(mtime_key)):
+        if body is not None:
+            _etag(body)
+            _etag(_gzipped(body))
+
+
+warm_caches()
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the aftershock visualization web app
+Author: Edward Xiong
+Diamond Bar High School, 11th Grade
+NHSJS Research Project: Testing Omori's Law
+
+Serves app.py with multiple threaded workers instead of Flask's
+single-process development server.
+
+Usage: gunicorn -c webapp/gunicorn_conf.py
+"""
+
+import gc
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = 'app:app'
+bind = '127.0.0.1:5001'
+
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_class = 'gthread'
+threads = 4
+
+# Import the app (and load its data) once in the master so workers share
+# it copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master before workers fork; keeps the garbage collector
+    # from touching, and so copying, the preloaded objects in each worker
+    gc.freeze()